@@ -0,0 +1,126 @@
+# crnn_runtime.py
+
+import json
+import os
+
+import cv2
+import numpy as np
+
+from ocr_metrics import ctc_greedy_decode
+
+# Prefer the slim tflite-runtime wheel on serving boxes; fall back to full TensorFlow
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+# Must match INPUT_WIDTH / INPUT_HEIGHT in data_pipeline.py (the model is built with them)
+INPUT_WIDTH = 390
+INPUT_HEIGHT = 32
+
+
+def save_charset(charset, charset_path):
+    """Saves the sorted character list produced by create_char_to_int_mapping."""
+    with open(charset_path, 'w', encoding='utf-8') as f:
+        json.dump(list(charset), f, ensure_ascii=False)
+
+
+def load_charset(charset_path):
+    """Loads a character list written by save_charset."""
+    with open(charset_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def preprocess_line_image(image_path, input_width=INPUT_WIDTH, input_height=INPUT_HEIGHT):
+    """
+    Loads a segmented line image into the (Width, Height, 1) float32 layout
+    produced by create_tf_dataset in data_pipeline.py.
+    """
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise FileNotFoundError(f"Could not read image at {image_path}")
+
+    image = image.astype(np.float32) / 255.0
+    # cv2.resize takes (Width, Height)
+    image = cv2.resize(image, (input_width, input_height), interpolation=cv2.INTER_LINEAR)
+    # Transpose to (Width, Height, Channels) for CRNN
+    return np.transpose(image)[..., np.newaxis]
+
+
+class TFLiteRecognizer:
+    """
+    Runs an exported CRNN .tflite model (float32, dynamic-range or full-integer).
+
+    Args:
+        model_path (str): Path to the .tflite file written by export_model.py.
+        charset (list): Sorted character list (see load_charset).
+        num_threads (int): Interpreter threads; None leaves the TFLite default.
+    """
+
+    def __init__(self, model_path, charset, num_threads=None):
+        self.charset = charset
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input_details['shape'][0])
+
+    def _resize_batch(self, batch_size):
+        if batch_size == self.batch_size:
+            return
+        shape = [batch_size] + list(self.input_details['shape'][1:])
+        self.interpreter.resize_tensor_input(self.input_details['index'], shape)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = batch_size
+
+    def predict(self, images):
+        """Returns softmax outputs for a float32 batch of shape (N, Width, Height, 1)."""
+        images = np.asarray(images, dtype=np.float32)
+        self._resize_batch(images.shape[0])
+
+        # Full-integer models take quantized input and return quantized output
+        input_dtype = self.input_details['dtype']
+        if input_dtype != np.float32:
+            scale, zero_point = self.input_details['quantization']
+            images = np.round(images / scale + zero_point)
+            info = np.iinfo(input_dtype)
+            images = np.clip(images, info.min, info.max).astype(input_dtype)
+
+        self.interpreter.set_tensor(self.input_details['index'], images)
+        self.interpreter.invoke()
+        outputs = self.interpreter.get_tensor(self.output_details['index'])
+
+        if self.output_details['dtype'] != np.float32:
+            scale, zero_point = self.output_details['quantization']
+            outputs = (outputs.astype(np.float32) - zero_point) * scale
+
+        return outputs
+
+    def recognize(self, images):
+        """Decodes a batch of preprocessed line images to text."""
+        return ctc_greedy_decode(self.predict(images), self.charset)
+
+    def recognize_files(self, image_paths):
+        """Preprocesses and decodes segmented line images from disk."""
+        images = np.stack([preprocess_line_image(p) for p in image_paths])
+        return self.recognize(images)
+
+
+def load_recognizer(export_dir, variant="int8", num_threads=None):
+    """
+    Loads a recognizer from an export_model.py output directory.
+
+    Args:
+        export_dir (str): Directory containing crnn_<variant>.tflite and charset.json.
+        variant (str): One of "float32", "dynamic" or "int8".
+        num_threads (int): Interpreter threads; defaults to $OCR_TFLITE_THREADS if set.
+    """
+    if num_threads is None and os.environ.get("OCR_TFLITE_THREADS"):
+        num_threads = int(os.environ["OCR_TFLITE_THREADS"])
+
+    charset = load_charset(os.path.join(export_dir, "charset.json"))
+    model_path = os.path.join(export_dir, f"crnn_{variant}.tflite")
+    return TFLiteRecognizer(model_path, charset, num_threads=num_threads)
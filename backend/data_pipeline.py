@@ -191,7 +191,7 @@ if __name__ == "__main__":
     ground_truth_dir = "ground_truth_data"
    
     # Step 1: Create a character mapping
-    char_to_int, int_to_char, _ = create_char_to_int_mapping(ground_truth_dir)
+    char_to_int, int_to_char, sorted_chars = create_char_to_int_mapping(ground_truth_dir)
     num_output_classes = len(char_to_int) # Total unique chars with the blank
     print(f"✅ Character to integer mapping created. Total classes (including <blank>): {num_output_classes}")
    
@@ -235,12 +235,27 @@ if __name__ == "__main__":
         print("\n--- Model Training Configuration ---")
         print("Model Compiled with Adam Optimizer and CTC Loss.")
        
+        # Step 8: Track CER/WER on a validation subsample, keep the best checkpoint on CER
+        from training_metrics import CERCallback
+
+        cer_callback = CERCallback(
+            val_dataset,
+            sorted_chars,
+            num_batches=8,   # Decode only a subsample to keep epoch time low
+            interval=1,      # Evaluate every epoch
+            checkpoint_path='best_crnn_model.h5',
+            patience=10      # Early stop after 10 evaluations without CER improvement
+        )
+
         # Training Run
         history = model.fit(
             train_dataset,
             validation_data=val_dataset,
-            epochs=50 # Example number of epochs
+            epochs=50, # Example number of epochs
+            callbacks=[cer_callback]
         )
+        if cer_callback.best_epoch is not None:
+            print(f"✅ Best validation CER {cer_callback.best_cer:.4f} at epoch {cer_callback.best_epoch}.")
         
         # Save the model after training
         model.save('final_crnn_model.h5')
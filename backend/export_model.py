@@ -0,0 +1,271 @@
+# export_model.py
+
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from tensorflow import keras
+
+from data_pipeline import (
+    create_char_to_int_mapping,
+    get_image_paths_and_labels,
+    create_tf_dataset,
+)
+from crnn_runtime import TFLiteRecognizer, save_charset
+from ocr_metrics import ctc_greedy_decode, decode_labels, corpus_error_rates
+
+TFLITE_VARIANTS = ("float32", "dynamic", "int8")
+
+
+def export_saved_model(model, export_dir):
+    """Exports a Keras CRNN model as a TensorFlow SavedModel."""
+    if hasattr(model, "export"):
+        model.export(export_dir)
+    else:
+        tf.saved_model.save(model, export_dir)
+    print(f"✅ SavedModel exported to {export_dir}")
+
+
+def make_representative_dataset(image_paths, labels, num_samples):
+    """
+    Builds a calibration generator for full-integer quantization.
+    Samples are drawn one line at a time from create_tf_dataset.
+    """
+    calibration_dataset = create_tf_dataset(image_paths, labels, batch_size=1).take(num_samples)
+
+    def representative_dataset():
+        for images, _ in calibration_dataset:
+            yield [images]
+
+    return representative_dataset
+
+
+def convert_to_tflite(saved_model_dir, variant, representative_dataset=None):
+    """
+    Converts a SavedModel to TFLite.
+
+    Args:
+        saved_model_dir (str): Directory written by export_saved_model.
+        variant (str): "float32", "dynamic" (dynamic-range) or "int8" (full-integer).
+        representative_dataset (callable): Calibration generator, required for "int8".
+    """
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+
+    if variant == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == "int8":
+        if representative_dataset is None:
+            raise ValueError("Full-integer quantization needs a representative dataset.")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        # Keep float builtins as a fallback for LSTM ops without an int8 kernel
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+        ]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif variant != "float32":
+        raise ValueError(f"Unknown TFLite variant: {variant}")
+
+    return converter.convert()
+
+
+def corpus_cer(predict_fn, eval_batches, charset):
+    """Corpus-level CER of predict_fn over the held-out batches (same definition as val_cer in training)."""
+    hypotheses = []
+    references = []
+    for images, label_batch in eval_batches:
+        hypotheses.extend(ctc_greedy_decode(predict_fn(images), charset))
+        references.extend(decode_labels(label_batch, charset))
+    cer, _ = corpus_error_rates(hypotheses, references)
+    return cer
+
+
+def served_cer(recognizer, image_paths, labels, batch_size=32):
+    """
+    Corpus-level CER through the serving path: TFLiteRecognizer.recognize_files,
+    which preprocesses with cv2 instead of the tf.image.resize in create_tf_dataset.
+    """
+    hypotheses = []
+    for i in range(0, len(image_paths), batch_size):
+        hypotheses.extend(recognizer.recognize_files(image_paths[i:i + batch_size]))
+    cer, _ = corpus_error_rates(hypotheses, list(labels))
+    return cer
+
+
+def per_line_latency_ms(predict_fn, lines, warmup=3):
+    """Median and p95 single-line latency in milliseconds (predict_fn takes a batch of one)."""
+    for line in lines[:warmup]:
+        predict_fn(line[np.newaxis] if isinstance(line, np.ndarray) else [line])
+
+    timings = []
+    for line in lines:
+        batch = line[np.newaxis] if isinstance(line, np.ndarray) else [line]
+        start = time.perf_counter()
+        predict_fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def path_size_mb(path):
+    """Size of a file or directory tree in megabytes."""
+    if os.path.isfile(path):
+        return os.path.getsize(path) / (1024 * 1024)
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total / (1024 * 1024)
+
+
+def export_and_verify(model_path, images_base_dir, ground_truth_dir, export_dir,
+                      num_calibration_samples=200, max_eval_lines=1000,
+                      num_latency_lines=50, num_threads=None, max_cer_delta=0.02,
+                      serving_variant="int8"):
+    """
+    Exports final_crnn_model.h5 to SavedModel and TFLite (float32, dynamic-range,
+    full-integer), then reports size, load time, per-line latency and CER on the
+    held-out split for every format. The serving_variant is also scored from the
+    image files through the runtime's own preprocessing (the "_served" row).
+
+    CER is corpus-level (total edit distance over total reference characters, the
+    same definition as val_cer in training), so max_cer_delta is an absolute
+    difference in corpus-level CER, not in the mean of per-line CERs.
+    """
+    if not os.path.exists(export_dir):
+        os.makedirs(export_dir)
+
+    # Rebuild the vocabulary and the exact validation split used in training
+    _, _, charset = create_char_to_int_mapping(ground_truth_dir)
+
+    image_paths, labels = get_image_paths_and_labels(images_base_dir, ground_truth_dir)
+    train_paths, val_paths, train_labels, val_labels = train_test_split(
+        image_paths, labels, test_size=0.1, random_state=42, stratify=None
+    )
+    val_paths, val_labels = val_paths[:max_eval_lines], val_labels[:max_eval_lines]
+    print(f"✅ Held-out split: {len(val_paths)} lines for parity checks.")
+
+    # Materialize once so every format is scored on identical inputs
+    eval_batches = [(images.numpy(), label_batch.numpy())
+                    for images, label_batch in create_tf_dataset(val_paths, val_labels, batch_size=32)]
+    latency_lines = np.concatenate([images for images, _ in eval_batches])[:num_latency_lines]
+
+    # --- Keras (float32 reference) ---
+    start = time.perf_counter()
+    keras_model = keras.models.load_model(model_path, compile=False)
+    keras_load_s = time.perf_counter() - start
+
+    # The model has len(char_to_int) + 1 outputs, and char_to_int is the charset plus
+    # '<blank>'. A mismatch means ground_truth_dir changed since training, and the
+    # charset (and every CER below) would silently be wrong.
+    if keras_model.output_shape[-1] != len(charset) + 2:
+        raise ValueError(
+            f"{model_path} has {keras_model.output_shape[-1]} output classes, but the charset "
+            f"rebuilt from {ground_truth_dir} implies {len(charset) + 2}. "
+            "Export with the ground truth the model was trained on."
+        )
+    save_charset(charset, os.path.join(export_dir, "charset.json"))
+
+    saved_model_dir = os.path.join(export_dir, "saved_model")
+    export_saved_model(keras_model, saved_model_dir)
+
+    representative_dataset = make_representative_dataset(
+        train_paths, train_labels, num_calibration_samples
+    )
+    tflite_paths = {}
+    for variant in TFLITE_VARIANTS:
+        tflite_model = convert_to_tflite(
+            saved_model_dir, variant,
+            representative_dataset if variant == "int8" else None
+        )
+        tflite_paths[variant] = os.path.join(export_dir, f"crnn_{variant}.tflite")
+        with open(tflite_paths[variant], "wb") as f:
+            f.write(tflite_model)
+        print(f"✅ TFLite ({variant}) model saved to {tflite_paths[variant]}")
+
+    report = []
+
+    keras_predict = lambda images: keras_model.predict_on_batch(images)
+    reference_cer = corpus_cer(keras_predict, eval_batches, charset)
+    report.append(("keras_h5", path_size_mb(model_path), keras_load_s,
+                   per_line_latency_ms(keras_predict, latency_lines), reference_cer))
+
+    # --- SavedModel ---
+    start = time.perf_counter()
+    serving_fn = tf.saved_model.load(saved_model_dir).signatures["serving_default"]
+    saved_model_load_s = time.perf_counter() - start
+
+    def saved_model_predict(images):
+        outputs = serving_fn(tf.constant(images, dtype=tf.float32))
+        return next(iter(outputs.values())).numpy()
+
+    report.append(("saved_model", path_size_mb(saved_model_dir), saved_model_load_s,
+                   per_line_latency_ms(saved_model_predict, latency_lines),
+                   corpus_cer(saved_model_predict, eval_batches, charset)))
+
+    # --- TFLite ---
+    for variant, tflite_path in tflite_paths.items():
+        start = time.perf_counter()
+        recognizer = TFLiteRecognizer(tflite_path, charset, num_threads=num_threads)
+        load_s = time.perf_counter() - start
+
+        report.append((f"tflite_{variant}", path_size_mb(tflite_path), load_s,
+                       per_line_latency_ms(recognizer.predict, latency_lines),
+                       corpus_cer(recognizer.predict, eval_batches, charset)))
+
+    # --- Served path: line images from disk, cv2 preprocessing, as recognition_scheduler runs it ---
+    tflite_path = tflite_paths[serving_variant]
+    start = time.perf_counter()
+    recognizer = TFLiteRecognizer(tflite_path, charset, num_threads=num_threads)
+    load_s = time.perf_counter() - start
+    report.append((f"tflite_{serving_variant}_served", path_size_mb(tflite_path), load_s,
+                   per_line_latency_ms(recognizer.recognize_files, val_paths[:num_latency_lines]),
+                   served_cer(recognizer, val_paths, val_labels)))
+
+    print("\n--- Export Report ---")
+    print(f"{'format':<22}{'size (MB)':>11}{'load (s)':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'CER':>8}")
+    for name, size_mb, load_s, (p50, p95), cer in report:
+        print(f"{name:<22}{size_mb:>11.2f}{load_s:>10.2f}{p50:>10.2f}{p95:>10.2f}{cer:>8.4f}")
+
+    parity_ok = True
+    for name, _, _, _, cer in report[1:]:
+        if cer - reference_cer > max_cer_delta:
+            print(f"⚠️ {name} CER {cer:.4f} exceeds float reference {reference_cer:.4f} by more than {max_cer_delta}")
+            parity_ok = False
+    if parity_ok:
+        print(f"✅ All exported formats within {max_cer_delta} CER of the float model.")
+
+    return report, parity_ok
+
+
+# Main execution block
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the trained CRNN for CPU serving.")
+    parser.add_argument("--model", default="final_crnn_model.h5")
+    parser.add_argument("--images-dir", default="segmented_lines")
+    parser.add_argument("--ground-truth-dir", default="ground_truth_data")
+    parser.add_argument("--export-dir", default="exported_model")
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--max-eval-lines", type=int, default=1000)
+    parser.add_argument("--latency-lines", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    parser.add_argument("--max-cer-delta", type=float, default=0.02,
+                        help="Allowed corpus-level CER increase over the float Keras model")
+    parser.add_argument("--serving-variant", choices=TFLITE_VARIANTS, default="int8",
+                        help="TFLite variant also scored through the serving preprocessing")
+    args = parser.parse_args()
+
+    _, parity_ok = export_and_verify(
+        args.model, args.images_dir, args.ground_truth_dir, args.export_dir,
+        num_calibration_samples=args.calibration_samples,
+        max_eval_lines=args.max_eval_lines,
+        num_latency_lines=args.latency_lines,
+        num_threads=args.threads,
+        max_cer_delta=args.max_cer_delta,
+        serving_variant=args.serving_variant,
+    )
+    raise SystemExit(0 if parity_ok else 1)
@@ -0,0 +1,93 @@
+# ocr_metrics.py
+
+import numpy as np
+
+# Decoding and error-rate helpers shared by training (training_metrics.py),
+# export parity checks (export_model.py) and serving (crnn_runtime.py).
+# Numpy only, so the serving side does not need TensorFlow.
+
+
+def ctc_greedy_decode(predictions, charset):
+    """
+    Greedy CTC decoding of softmax outputs of shape (batch, time_steps, classes).
+
+    The CTC blank is the last output channel (see ctc_loss_func); indices outside
+    the charset (including the '<blank>' padding token) are dropped.
+    """
+    predictions = np.asarray(predictions)
+    blank_index = predictions.shape[-1] - 1
+    best_paths = np.argmax(predictions, axis=-1)
+
+    # Collapse repeats, then remove blanks (vectorized over the whole batch)
+    keep = np.ones(best_paths.shape, dtype=bool)
+    keep[:, 1:] = best_paths[:, 1:] != best_paths[:, :-1]
+    keep &= (best_paths != blank_index) & (best_paths < len(charset))
+
+    return [''.join(charset[i] for i in path[mask]) for path, mask in zip(best_paths, keep)]
+
+
+def decode_labels(label_batch, charset):
+    """Turns a padded batch of encoded labels from create_tf_dataset back into text."""
+    return [''.join(charset[i] for i in label if i < len(charset)) for label in np.asarray(label_batch)]
+
+
+def batch_edit_distance(hypotheses, references):
+    """
+    Levenshtein distance for every (hypothesis, reference) pair of integer sequences.
+
+    The dynamic programme is vectorized across the batch and the reference axis;
+    only the hypothesis axis is looped over. Insertions within a row are resolved
+    with a running minimum: row[j] = min_k (tmp[k] + j - k).
+    """
+    num_pairs = len(hypotheses)
+    if num_pairs == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    hyp_lengths = np.array([len(seq) for seq in hypotheses])
+    ref_lengths = np.array([len(seq) for seq in references])
+    hyp = np.full((num_pairs, max(hyp_lengths.max(), 1)), -1, dtype=np.int64)
+    ref = np.full((num_pairs, max(ref_lengths.max(), 1)), -2, dtype=np.int64)
+    for row, (h, r) in enumerate(zip(hypotheses, references)):
+        hyp[row, :len(h)] = h
+        ref[row, :len(r)] = r
+
+    columns = np.arange(ref.shape[1] + 1)
+    previous = np.tile(columns, (num_pairs, 1))
+    for i in range(hyp_lengths.max()):
+        substitution = previous[:, :-1] + (hyp[:, i:i + 1] != ref)
+        deletion = previous[:, 1:] + 1
+        current = np.empty_like(previous)
+        current[:, 0] = previous[:, 0] + 1
+        current[:, 1:] = np.minimum(substitution, deletion)
+        current = np.minimum.accumulate(current - columns, axis=1) + columns
+        # Pairs whose hypothesis is already exhausted keep their last row
+        previous = np.where((i < hyp_lengths)[:, None], current, previous)
+
+    return previous[np.arange(num_pairs), ref_lengths]
+
+
+def corpus_error_rates(hypotheses, references):
+    """
+    Corpus-level CER and WER: total edit distance over total reference length,
+    so long lines weigh more than short ones (unlike the per-page average
+    printed by eval_ocr.evaluate_ocr).
+
+    Args:
+        hypotheses (list): Recognized texts.
+        references (list): Ground truth texts, in the same order.
+    """
+    char_errors = batch_edit_distance(
+        [[ord(c) for c in text] for text in hypotheses],
+        [[ord(c) for c in text] for text in references],
+    ).sum()
+    char_total = sum(len(text) for text in references)
+
+    vocabulary = {}
+    hypothesis_words = [[vocabulary.setdefault(w, len(vocabulary)) for w in text.split()] for text in hypotheses]
+    reference_words = [[vocabulary.setdefault(w, len(vocabulary)) for w in text.split()] for text in references]
+    word_errors = batch_edit_distance(hypothesis_words, reference_words).sum()
+    word_total = sum(len(words) for words in reference_words)
+
+    cer = char_errors / char_total if char_total else float("nan")
+    wer = word_errors / word_total if word_total else float("nan")
+    return float(cer), float(wer)
@@ -0,0 +1,360 @@
+# recognition_scheduler.py
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class MicroBatchScheduler:
+    """
+    Merges line/page recognition requests from concurrent submissions into
+    micro-batches for a single batch function.
+
+    A batch is dispatched once it holds max_batch_size items or the oldest
+    queued item has waited max_wait_ms. Batches are filled round-robin across
+    submissions so one large script cannot starve the others, and at most
+    max_concurrency batches run at the same time. While every slot is busy
+    requests keep queueing, so batches grow with load and shrink when idle.
+
+    Args:
+        batch_fn (callable): Takes a list of items, returns a list of results in order.
+        max_batch_size (int): Upper bound on items per batch.
+        max_wait_ms (float): Longest time the oldest queued item waits for a batch to fill.
+        max_concurrency (int): Global cap on batches running at once.
+        max_pending_per_submission (int): Per-submission queue bound; submit blocks beyond it.
+        latency_window (int): Number of recent requests used for latency percentiles.
+        executor (ThreadPoolExecutor): Worker pool to run batches on, with at least
+            max_concurrency workers. Passing one keeps warmed-up workers (and their
+            loaded models) across schedulers; the caller then owns its shutdown.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=10, max_concurrency=2,
+                 max_pending_per_submission=256, latency_window=10000, executor=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending_per_submission = max_pending_per_submission
+
+        self._queues = OrderedDict()  # submission_id -> deque of (item, future, enqueued_at)
+        self._pending = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ocr-batch")
+
+        self._latencies = deque(maxlen=latency_window)
+        self._batches = 0
+        self._batched_items = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._started_at = time.perf_counter()
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="ocr-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, submission_id, item):
+        """Queues one item and returns a Future for its result."""
+        future = Future()
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Scheduler is closed.")
+                # Re-fetch after waiting: a drained queue is removed by _take_batch
+                queue = self._queues.setdefault(submission_id, deque())
+                if len(queue) < self.max_pending_per_submission:
+                    break
+                self._cond.wait()
+            queue.append((item, future, time.perf_counter()))
+            self._pending += 1
+            self._cond.notify_all()
+        return future
+
+    def recognize(self, submission_id, items, timeout=None):
+        """
+        Submits all items of one submission and waits for their results, in order.
+        If waiting fails (timeout or item error), the submission's still-queued
+        items are cancelled so no work is done for a caller that stopped waiting.
+        """
+        futures = [self.submit(submission_id, item) for item in items]
+        try:
+            return [future.result(timeout=timeout) for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def _take_batch(self):
+        """Pops up to max_batch_size items round-robin across submissions (lock held)."""
+        batch = []
+        while len(batch) < self.max_batch_size and self._queues:
+            submission_id, queue = next(iter(self._queues.items()))
+            batch.append(queue.popleft())
+            # Served submissions go to the back of the line
+            self._queues.move_to_end(submission_id)
+            if not queue:
+                del self._queues[submission_id]
+        self._pending -= len(batch)
+        self._cond.notify_all()
+        return batch
+
+    def _oldest_enqueued_at(self):
+        return min(queue[0][2] for queue in self._queues.values())
+
+    def _dispatch_loop(self):
+        while True:
+            # Wait for a free slot first, so requests accumulate while all slots are busy
+            self._slots.acquire()
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    self._slots.release()
+                    return
+                deadline = self._oldest_enqueued_at() + self.max_wait
+                while self._pending < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+                self._in_flight += 1
+            self._executor.submit(self._run_batch, batch)
+
+    def _call_batch_fn(self, items):
+        results = self.batch_fn(items)
+        if len(results) != len(items):
+            raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        return results
+
+    def _run_batch(self, batch):
+        # Drop requests cancelled while queued; the rest can no longer be cancelled
+        live = [request for request in batch if request[1].set_running_or_notify_cancel()]
+        try:
+            if not live:
+                return
+            try:
+                results = self._call_batch_fn([item for item, _, _ in live])
+            except Exception:
+                # Retry one item at a time so a bad item only fails its own request,
+                # not every other submission that shared the micro-batch
+                results = None
+            if results is not None:
+                for (_, future, _), result in zip(live, results):
+                    future.set_result(result)
+            else:
+                for item, future, _ in live:
+                    try:
+                        future.set_result(self._call_batch_fn([item])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+        finally:
+            finished_at = time.perf_counter()
+            with self._cond:
+                self._latencies.extend(finished_at - enqueued_at for _, _, enqueued_at in live)
+                self._batches += 1
+                self._batched_items += len(batch)
+                self._completed += len(live)
+                self._in_flight -= 1
+                self._cond.notify_all()
+            self._slots.release()
+
+    def metrics(self):
+        """Queue depth, batch fill ratio, throughput and p50/p95/p99 latency (ms)."""
+        with self._cond:
+            latencies = np.array(self._latencies) * 1000
+            metrics = {
+                "queue_depth": self._pending,
+                "active_submissions": len(self._queues),
+                "in_flight_batches": self._in_flight,
+                "batches": self._batches,
+                "completed": self._completed,
+                "batch_fill_ratio": (self._batched_items / (self._batches * self.max_batch_size)
+                                     if self._batches else 0.0),
+                "throughput_per_s": self._completed / (time.perf_counter() - self._started_at),
+            }
+        for p in (50, 95, 99):
+            metrics[f"p{p}_ms"] = float(np.percentile(latencies, p)) if latencies.size else 0.0
+        return metrics
+
+    def close(self):
+        """Drains queued requests and stops the dispatcher and workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+        else:
+            # Still wait for this scheduler's in-flight batches on the shared pool
+            with self._cond:
+                while self._in_flight:
+                    self._cond.wait()
+
+
+def make_crnn_batch_fn(export_dir, variant="int8", num_threads=None, max_batch_size=32,
+                       batch_buckets=None):
+    """
+    Batch function over segmented line image paths using the exported CRNN.
+
+    Micro-batches arrive in every size up to max_batch_size, so each batch is
+    zero-padded to the smallest fixed bucket that holds it and the outputs are
+    trimmed. Every worker thread keeps one interpreter per bucket (TFLite
+    interpreters are not thread-safe), so tensors are allocated once per bucket
+    instead of on nearly every batch.
+
+    Args:
+        batch_buckets (tuple): Padded batch sizes; the largest must cover max_batch_size.
+            Defaults to powers of two below max_batch_size plus max_batch_size itself,
+            so padding never more than doubles a batch.
+    """
+    from crnn_runtime import load_recognizer, preprocess_line_image
+
+    if batch_buckets is None:
+        batch_buckets = [2 ** i for i in range(max_batch_size.bit_length()) if 2 ** i < max_batch_size]
+        batch_buckets.append(max_batch_size)
+    batch_buckets = sorted(set(batch_buckets))
+    # Larger batches would each cache an interpreter of their own size
+    assert batch_buckets[-1] >= max_batch_size, "batch_buckets must cover max_batch_size"
+
+    local = threading.local()
+
+    def batch_fn(image_paths):
+        images = np.stack([preprocess_line_image(p) for p in image_paths])
+        count = len(images)
+        if count > batch_buckets[-1]:
+            raise ValueError(f"Batch of {count} exceeds the largest bucket ({batch_buckets[-1]})")
+        bucket = next(b for b in batch_buckets if b >= count)
+
+        recognizers = local.__dict__.setdefault("recognizers", {})
+        if bucket not in recognizers:
+            recognizers[bucket] = load_recognizer(export_dir, variant, num_threads=num_threads)
+        if bucket > count:
+            padding = np.zeros((bucket - count,) + images.shape[1:], dtype=images.dtype)
+            images = np.concatenate([images, padding])
+        return recognizers[bucket].recognize(images)[:count]
+
+    # Exposed so callers can warm up one interpreter per bucket
+    batch_fn.batch_buckets = batch_buckets
+    return batch_fn
+
+
+def make_easyocr_batch_fn(languages=("en",), gpu=False, num_threads=None):
+    """
+    Batch function over page image paths using EasyOCR, with one Reader per worker
+    thread instead of one per page as in image_ocr.perform_ocr_and_save.
+
+    Pages from pdf_processor.pdf_to_images share one size, so a whole micro-batch
+    goes through readtext_batched in one call.
+
+    Args:
+        num_threads (int): Torch intra-op threads per worker; keep workers x threads
+            within the core count so concurrent batches do not oversubscribe the CPU.
+    """
+    import easyocr
+    import torch
+
+    local = threading.local()
+
+    def batch_fn(image_paths):
+        if not hasattr(local, "reader"):
+            if num_threads:
+                torch.set_num_threads(num_threads)
+            local.reader = easyocr.Reader(list(languages), gpu=gpu)
+        batch_results = local.reader.readtext_batched(list(image_paths))
+        return [" ".join(text for (_, text, _) in results) for results in batch_results]
+
+    return batch_fn
+
+
+def make_handler(scheduler):
+    """
+    HTTP handler for the scheduler:
+        POST /recognize  {"submission_id": "...", "image_paths": [...]} -> {"texts": [...]}
+        GET  /metrics    -> scheduler.metrics()
+    """
+
+    class RecognitionHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send_json(200, scheduler.metrics())
+            else:
+                self._send_json(404, {"message": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/recognize":
+                return self._send_json(404, {"message": "Not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                submission_id = str(request["submission_id"])
+                image_paths = list(request["image_paths"])
+            except (ValueError, KeyError, TypeError):
+                return self._send_json(400, {"message": "submission_id and image_paths are required"})
+            try:
+                texts = scheduler.recognize(submission_id, image_paths)
+            except Exception as e:
+                return self._send_json(500, {"message": f"Recognition failed: {e}"})
+            self._send_json(200, {"texts": texts})
+
+        def log_message(self, format, *args):
+            pass  # Per-request access logs are too noisy under load
+
+    return RecognitionHandler
+
+
+# Main execution block
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching OCR/recognition service.")
+    parser.add_argument("--engine", choices=["crnn", "easyocr"], default="crnn")
+    parser.add_argument("--export-dir", default="exported_model", help="export_model.py output (crnn)")
+    parser.add_argument("--variant", default="int8", help="TFLite variant (crnn)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Inference threads per worker (default: cpu_count // max-concurrency)")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--max-concurrency", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--max-pending-per-submission", type=int, default=256)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("OCR_SCHEDULER_PORT", 8765)))
+    args = parser.parse_args()
+    # Split the cores between workers so concurrent batches do not oversubscribe them
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.max_concurrency)
+
+    if args.engine == "crnn":
+        batch_fn = make_crnn_batch_fn(args.export_dir, args.variant, num_threads=threads,
+                                      max_batch_size=args.max_batch_size)
+    else:
+        batch_fn = make_easyocr_batch_fn(num_threads=threads)
+
+    scheduler = MicroBatchScheduler(
+        batch_fn,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_concurrency=args.max_concurrency,
+        max_pending_per_submission=args.max_pending_per_submission,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(scheduler))
+    print(f"✅ Recognition scheduler ({args.engine}) listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        scheduler.close()
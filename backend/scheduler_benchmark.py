@@ -0,0 +1,149 @@
+# scheduler_benchmark.py
+
+import argparse
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from recognition_scheduler import MicroBatchScheduler, make_crnn_batch_fn
+
+
+def make_simulated_batch_fn(fixed_ms=20.0, per_item_ms=2.0):
+    """
+    Stand-in for a model: each batch costs a fixed overhead plus a per-item cost.
+    Lets the scheduler be benchmarked on a dev box without a trained model.
+    """
+    def batch_fn(items):
+        time.sleep((fixed_ms + per_item_ms * len(items)) / 1000)
+        return [f"line {item}" for item in items]
+
+    return batch_fn
+
+
+def warm_up_workers(executor, batch_fn, items, batch_sizes, num_workers):
+    """
+    Runs one batch of every swept size on every worker thread, so per-thread
+    model loading (e.g. CRNN interpreters) happens before any timed run.
+    """
+    # The barrier holds each task until all have started, forcing one task per thread
+    barrier = threading.Barrier(num_workers)
+
+    def warm_up():
+        barrier.wait()
+        for batch_size in batch_sizes:
+            batch_fn([items[i % len(items)] for i in range(batch_size)])
+
+    for future in [executor.submit(warm_up) for _ in range(num_workers)]:
+        future.result()
+
+
+def run_load(scheduler, items, num_submissions, lines_per_submission, arrival_interval_ms, seed=0):
+    """
+    Simulates concurrent gradeStudentSubmission calls: each submission thread
+    starts after a random exponential gap and submits all its lines at once.
+
+    Returns:
+        tuple: (wall time in seconds, per-submission completion times in seconds)
+    """
+    rng = np.random.default_rng(seed)
+    start_offsets = np.cumsum(rng.exponential(arrival_interval_ms / 1000, num_submissions))
+    submission_times = [0.0] * num_submissions
+
+    def submission(index):
+        time.sleep(start_offsets[index])
+        lines = [items[(index * lines_per_submission + i) % len(items)] for i in range(lines_per_submission)]
+        started = time.perf_counter()
+        scheduler.recognize(f"submission-{index}", lines)
+        submission_times[index] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=submission, args=(i,)) for i in range(num_submissions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, submission_times
+
+
+def benchmark(batch_fn, items, batch_sizes, wait_windows_ms, max_concurrency,
+              num_submissions, lines_per_submission, arrival_interval_ms):
+    """
+    Sweeps max_batch_size x max_wait_ms and prints a throughput/latency table.
+    All sweep points share one warmed-up worker pool, so model load time is
+    kept out of the reported latencies.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ocr-batch")
+    # Warm every padding bucket the batch function uses, not just the swept sizes
+    warm_up_sizes = getattr(batch_fn, "batch_buckets", batch_sizes)
+    warm_up_workers(executor, batch_fn, items, warm_up_sizes, max_concurrency)
+
+    print(f"{'batch':>6}{'wait(ms)':>10}{'lines/s':>10}{'fill':>7}"
+          f"{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'script p95(s)':>15}")
+    rows = []
+    for max_batch_size in batch_sizes:
+        for max_wait_ms in wait_windows_ms:
+            scheduler = MicroBatchScheduler(
+                batch_fn,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_concurrency=max_concurrency,
+                executor=executor,
+            )
+            wall_s, submission_times = run_load(
+                scheduler, items, num_submissions, lines_per_submission, arrival_interval_ms
+            )
+            metrics = scheduler.metrics()
+            scheduler.close()
+
+            throughput = num_submissions * lines_per_submission / wall_s
+            script_p95 = float(np.percentile(submission_times, 95))
+            print(f"{max_batch_size:>6}{max_wait_ms:>10.1f}{throughput:>10.1f}"
+                  f"{metrics['batch_fill_ratio']:>7.2f}{metrics['p50_ms']:>10.1f}"
+                  f"{metrics['p95_ms']:>10.1f}{metrics['p99_ms']:>10.1f}{script_p95:>15.2f}")
+            rows.append((max_batch_size, max_wait_ms, throughput, metrics, script_p95))
+
+    executor.shutdown(wait=True)
+    return rows
+
+
+# Main execution block
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput vs latency benchmark for the recognition scheduler.")
+    parser.add_argument("--engine", choices=["simulated", "crnn"], default="simulated")
+    parser.add_argument("--export-dir", default="exported_model", help="export_model.py output (crnn)")
+    parser.add_argument("--variant", default="int8")
+    parser.add_argument("--threads", type=int, default=1, help="TFLite threads per worker (crnn)")
+    parser.add_argument("--lines-dir", default="synthetic_corpus/segmented_lines",
+                        help="Segmented lines to recognize, e.g. from synthetic_corpus.py (crnn)")
+    parser.add_argument("--batch-sizes", default="1,8,32,64")
+    parser.add_argument("--wait-ms", default="0,5,20")
+    parser.add_argument("--max-concurrency", type=int, default=2)
+    parser.add_argument("--submissions", type=int, default=50)
+    parser.add_argument("--lines-per-submission", type=int, default=40)
+    parser.add_argument("--arrival-interval-ms", type=float, default=50)
+    args = parser.parse_args()
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    if args.engine == "crnn":
+        items = sorted(glob.glob(os.path.join(args.lines_dir, "*", "*.png")))
+        if not items:
+            raise SystemExit(f"❌ ERROR: No line images found under {args.lines_dir}.")
+        batch_fn = make_crnn_batch_fn(args.export_dir, args.variant, num_threads=args.threads,
+                                      max_batch_size=max(batch_sizes))
+    else:
+        items = list(range(1000))
+        batch_fn = make_simulated_batch_fn()
+
+    benchmark(
+        batch_fn, items,
+        batch_sizes=batch_sizes,
+        wait_windows_ms=[float(w) for w in args.wait_ms.split(",")],
+        max_concurrency=args.max_concurrency,
+        num_submissions=args.submissions,
+        lines_per_submission=args.lines_per_submission,
+        arrival_interval_ms=args.arrival_interval_ms,
+    )
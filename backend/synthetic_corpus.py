@@ -0,0 +1,256 @@
+# synthetic_corpus.py
+
+import argparse
+import json
+import os
+from functools import partial
+from multiprocessing import Pool
+
+import cv2
+import fitz
+import numpy as np
+
+# A4 at the zoom factor used by pdf_processor.pdf_to_images (72 dpi * 3)
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+RENDER_ZOOM = 3
+
+# Hershey fonts only cover printable ASCII, so the vocabulary stays within it
+WORDS = (
+    "the a an of to in is and for on with by as that this from are be it or "
+    "algorithm array binary bit buffer cache class compiler data database disk "
+    "edge element function graph hash heap index input integer key kernel list "
+    "loop memory method network node object operating output page pointer "
+    "process program queue recursion register schedule search sort stack "
+    "string system thread tree value variable vertex virtual"
+).split()
+PUNCTUATION = [",", ".", ";", ":", "?"]
+FONTS = [
+    cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+    cv2.FONT_HERSHEY_SCRIPT_COMPLEX,
+    cv2.FONT_HERSHEY_SIMPLEX,
+]
+
+
+def random_line_text(rng, min_words=3, max_words=9):
+    """Builds one answer line from the word list, with occasional numbering and punctuation."""
+    words = list(rng.choice(WORDS, size=rng.integers(min_words, max_words + 1)))
+    if rng.random() < 0.1:
+        words.insert(0, f"{rng.integers(1, 10)}{rng.choice(['.', ')', 'a)', 'b)'])}")
+    if rng.random() < 0.3:
+        words[-1] += rng.choice(PUNCTUATION)
+    if rng.random() < 0.1:
+        words.append(str(rng.integers(0, 1000)))
+    return " ".join(words)
+
+
+def add_noise(image, rng, noise_level):
+    """Adds Gaussian sensor noise and salt-and-pepper specks to a grayscale image."""
+    if noise_level <= 0:
+        return image
+    noisy = image.astype(np.float32) + rng.normal(0, 40 * noise_level, image.shape)
+    specks = rng.random(image.shape)
+    noisy[specks < 0.01 * noise_level] = 0
+    noisy[specks > 1 - 0.01 * noise_level] = 255
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def skew_image(image, angle):
+    """Rotates a page by angle degrees, the inverse of deskewer.deskew."""
+    if angle == 0:
+        return image
+    (h, w) = image.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderValue=255)
+
+
+def render_page(lines, rng, lines_per_page, line_padding=10):
+    """
+    Renders text lines onto a blank page.
+
+    Returns:
+        tuple: (page image, list of line crops) — crops are taken before skew
+        and padded like line_segment.segment_lines does.
+    """
+    width = PDF_PAGE_WIDTH * RENDER_ZOOM
+    height = PDF_PAGE_HEIGHT * RENDER_ZOOM
+    page = np.full((height, width), 255, dtype=np.uint8)
+
+    margin_x = width // 12
+    margin_y = height // 14
+    line_pitch = (height - 2 * margin_y) // max(lines_per_page, 1)
+    font = FONTS[rng.integers(len(FONTS))]
+    thickness = int(rng.integers(2, 5))
+
+    line_crops = []
+    for i, text in enumerate(lines):
+        # Shrink the glyphs until the line fits the page width and pitch
+        scale = min(2.0, line_pitch / 40)
+        (text_w, text_h), baseline = cv2.getTextSize(text, font, scale, thickness)
+        while text_w > width - 2 * margin_x and scale > 0.5:
+            scale *= 0.9
+            (text_w, text_h), baseline = cv2.getTextSize(text, font, scale, thickness)
+
+        x = margin_x + int(rng.integers(0, margin_x // 2))
+        y = margin_y + i * line_pitch + text_h
+        cv2.putText(page, text, (x, y), font, scale, 0, thickness, cv2.LINE_AA)
+
+        top = max(0, y - text_h - line_padding)
+        bottom = min(height, y + baseline + line_padding)
+        line_crops.append(page[top:bottom, :].copy())
+
+    return page, line_crops
+
+
+def generate_script(script_index, output_dir, seed, min_pages, max_pages, lines_per_page,
+                    max_skew, noise_level, blank_page_prob, write_pdf, write_lines, jpeg_quality=85):
+    """
+    Generates one synthetic answer script. Each script draws from its own seeded
+    generator, so output does not depend on worker count or ordering.
+
+    Returns:
+        tuple: (number of pages, number of text lines)
+    """
+    rng = np.random.default_rng([seed, script_index])
+    script_id = f"SYN{script_index:06d}"
+    num_pages = int(rng.integers(min_pages, max_pages + 1))
+
+    doc = fitz.open() if write_pdf else None
+    num_lines = 0
+
+    for page_num in range(1, num_pages + 1):
+        page_name = f"{script_id}_page_{page_num}"
+        if rng.random() < blank_page_prob:
+            lines = []
+        else:
+            lines = [random_line_text(rng) for _ in range(int(rng.integers(1, lines_per_page + 1)))]
+
+        page, line_crops = render_page(lines, rng, lines_per_page)
+        page = add_noise(skew_image(page, rng.uniform(-max_skew, max_skew)), rng, noise_level)
+
+        if doc is not None:
+            # Store pages as JPEG like a scanner would; a noisy page is ~2x smaller than PNG
+            _, jpeg = cv2.imencode(".jpg", page, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+            pdf_page = doc.new_page(width=PDF_PAGE_WIDTH, height=PDF_PAGE_HEIGHT)
+            pdf_page.insert_image(pdf_page.rect, stream=jpeg.tobytes())
+
+        # Page-level truth for eval_ocr.evaluate_ocr, named like pdf_to_images output.
+        # Blank pages get no file since calculate_cer divides by the truth length.
+        if lines:
+            page_truth_dir = os.path.join(output_dir, "ground_truth_texts", script_id)
+            os.makedirs(page_truth_dir, exist_ok=True)
+            with open(os.path.join(page_truth_dir, f"page_{page_num}.txt"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines))
+
+        # Line-level images and truth for data_pipeline.get_image_paths_and_labels
+        if write_lines and lines:
+            line_image_dir = os.path.join(output_dir, "segmented_lines", page_name)
+            line_truth_dir = os.path.join(output_dir, "ground_truth_data", page_name)
+            os.makedirs(line_image_dir, exist_ok=True)
+            os.makedirs(line_truth_dir, exist_ok=True)
+            for line_num, (text, crop) in enumerate(zip(lines, line_crops), start=1):
+                cv2.imwrite(os.path.join(line_image_dir, f"line_{line_num}.png"),
+                            add_noise(crop, rng, noise_level))
+                with open(os.path.join(line_truth_dir, f"line_{line_num}.txt"), 'w', encoding='utf-8') as f:
+                    f.write(text)
+
+        num_lines += len(lines)
+
+    if doc is not None:
+        # No deflate: the image streams are already compressed, so it only costs time.
+        # no_new_id keeps the trailer /ID fixed, so the same seed yields byte-identical PDFs
+        doc.save(os.path.join(output_dir, "AnswerScripts", f"{script_id}.pdf"), no_new_id=True)
+        doc.close()
+
+    return num_pages, num_lines
+
+
+def generate_corpus(output_dir, num_scripts, seed=0, min_pages=2, max_pages=8,
+                    lines_per_page=20, max_skew=3.0, noise_level=0.3,
+                    blank_page_prob=0.05, write_pdf=True, write_lines=True, workers=1,
+                    jpeg_quality=85):
+    """
+    Generates a deterministic synthetic corpus of answer scripts.
+
+    Layout under output_dir:
+        AnswerScripts/SYNxxxxxx.pdf                      -> pdf_processor.pdf_to_images
+        ground_truth_texts/SYNxxxxxx/page_N.txt          -> eval_ocr.evaluate_ocr
+        segmented_lines/SYNxxxxxx_page_N/line_M.png      -> data_pipeline.get_image_paths_and_labels
+        ground_truth_data/SYNxxxxxx_page_N/line_M.txt
+        manifest.json
+
+    Args:
+        output_dir (str): Root directory of the corpus.
+        num_scripts (int): Number of answer scripts (PDFs) to generate.
+        seed (int): Base seed; the same seed always yields the same corpus.
+        min_pages, max_pages (int): Page count range per script.
+        lines_per_page (int): Maximum text lines per page (controls line density).
+        max_skew (float): Maximum absolute page rotation in degrees.
+        noise_level (float): 0 for clean scans, 1 for heavy noise.
+        blank_page_prob (float): Probability that a page has no text.
+        write_pdf (bool): Write the multi-page PDFs.
+        write_lines (bool): Write the segmented line images and line truth.
+        workers (int): Number of worker processes.
+        jpeg_quality (int): JPEG quality of the scanned pages stored in the PDFs.
+    """
+    os.makedirs(os.path.join(output_dir, "AnswerScripts"), exist_ok=True)
+
+    worker = partial(
+        generate_script, output_dir=output_dir, seed=seed,
+        min_pages=min_pages, max_pages=max_pages, lines_per_page=lines_per_page,
+        max_skew=max_skew, noise_level=noise_level, blank_page_prob=blank_page_prob,
+        write_pdf=write_pdf, write_lines=write_lines, jpeg_quality=jpeg_quality,
+    )
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = pool.map(worker, range(num_scripts), chunksize=max(1, num_scripts // (workers * 4)))
+    else:
+        results = [worker(i) for i in range(num_scripts)]
+
+    manifest = {
+        "seed": seed,
+        "num_scripts": num_scripts,
+        "num_pages": sum(pages for pages, _ in results),
+        "num_lines": sum(lines for _, lines in results),
+        "min_pages": min_pages,
+        "max_pages": max_pages,
+        "lines_per_page": lines_per_page,
+        "max_skew": max_skew,
+        "noise_level": noise_level,
+        "blank_page_prob": blank_page_prob,
+        "jpeg_quality": jpeg_quality,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"✅ Generated {manifest['num_scripts']} scripts, {manifest['num_pages']} pages, "
+          f"{manifest['num_lines']} lines in {output_dir}")
+    return manifest
+
+
+# Main execution block
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic answer-script corpus.")
+    parser.add_argument("--output-dir", default="synthetic_corpus")
+    parser.add_argument("--scripts", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-pages", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=8)
+    parser.add_argument("--lines-per-page", type=int, default=20)
+    parser.add_argument("--max-skew", type=float, default=3.0)
+    parser.add_argument("--noise", type=float, default=0.3)
+    parser.add_argument("--blank-page-prob", type=float, default=0.05)
+    parser.add_argument("--jpeg-quality", type=int, default=85, help="JPEG quality of PDF pages")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip writing PDFs")
+    parser.add_argument("--no-lines", action="store_true", help="Skip writing segmented lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    generate_corpus(
+        args.output_dir, args.scripts, seed=args.seed,
+        min_pages=args.min_pages, max_pages=args.max_pages,
+        lines_per_page=args.lines_per_page, max_skew=args.max_skew,
+        noise_level=args.noise, blank_page_prob=args.blank_page_prob,
+        write_pdf=not args.no_pdf, write_lines=not args.no_lines,
+        workers=args.workers, jpeg_quality=args.jpeg_quality,
+    )
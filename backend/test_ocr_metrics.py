@@ -0,0 +1,47 @@
+# test_ocr_metrics.py
+
+import random
+
+import numpy as np
+
+from ocr_metrics import batch_edit_distance, corpus_error_rates, ctc_greedy_decode
+
+
+def levenshtein(a, b):
+    """Plain single-row Levenshtein distance, used as the reference."""
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        diagonal, row[0] = row[0], i
+        for j, y in enumerate(b, start=1):
+            diagonal, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, diagonal + (x != y))
+    return row[-1]
+
+
+def test_batch_edit_distance_matches_levenshtein():
+    rng = random.Random(0)
+    hypotheses = [[rng.randint(0, 4) for _ in range(rng.randint(0, 15))] for _ in range(2000)]
+    references = [[rng.randint(0, 4) for _ in range(rng.randint(0, 15))] for _ in range(2000)]
+
+    distances = batch_edit_distance(hypotheses, references)
+
+    assert list(distances) == [levenshtein(h, r) for h, r in zip(hypotheses, references)]
+
+
+def test_batch_edit_distance_empty_batch():
+    assert batch_edit_distance([], []).size == 0
+
+
+def test_ctc_greedy_decode_collapses_repeats_and_drops_blanks():
+    charset = ['a', 'b']
+    # Channel 2 is the '<blank>' label token, channel 3 the CTC blank
+    best_path = [0, 0, 3, 0, 1, 2, 1]
+    predictions = np.eye(4)[best_path][np.newaxis]
+
+    assert ctc_greedy_decode(predictions, charset) == ['aabb']
+
+
+def test_corpus_error_rates_weigh_by_reference_length():
+    cer, wer = corpus_error_rates(['helo world', 'abc'], ['hello world', 'abd'])
+
+    assert cer == 2 / 14
+    assert wer == 2 / 3
@@ -0,0 +1,71 @@
+# training_metrics.py
+
+from tensorflow import keras
+
+from ocr_metrics import ctc_greedy_decode, decode_labels, corpus_error_rates
+
+
+class CERCallback(keras.callbacks.Callback):
+    """
+    Tracks validation CER/WER during training and optionally early-stops and
+    keeps the best checkpoint on CER.
+
+    Adds 'val_cer' and 'val_wer' to the epoch logs on evaluated epochs, so they
+    appear in the History object. Place it before any callback that reads them.
+
+    Args:
+        validation_dataset (tf.data.Dataset): Batched (images, labels) dataset from create_tf_dataset.
+        charset (list): Sorted character list from create_char_to_int_mapping.
+        num_batches (int): Validation batches to decode; the subsample is fixed on first use.
+        interval (int): Evaluate every `interval` epochs.
+        checkpoint_path (str): If set, save the model here whenever CER improves.
+        patience (int): Stop after this many evaluations without improvement; None disables.
+        min_delta (float): Minimum CER decrease that counts as an improvement.
+    """
+
+    def __init__(self, validation_dataset, charset, num_batches=8, interval=1,
+                 checkpoint_path=None, patience=None, min_delta=0.0):
+        super().__init__()
+        # Cache after take() so every evaluation scores the same shuffled subsample
+        self.validation_dataset = validation_dataset.take(num_batches).cache()
+        self.charset = charset
+        self.interval = interval
+        self.checkpoint_path = checkpoint_path
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best_cer = float("inf")
+        self.best_epoch = None
+        self.wait = 0
+
+    def evaluate(self):
+        """Returns corpus-level (CER, WER) of the current model on the validation subsample."""
+        hypotheses = []
+        references = []
+        for images, label_batch in self.validation_dataset:
+            predictions = self.model.predict_on_batch(images)
+            hypotheses.extend(ctc_greedy_decode(predictions, self.charset))
+            references.extend(decode_labels(label_batch, self.charset))
+        return corpus_error_rates(hypotheses, references)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if (epoch + 1) % self.interval != 0:
+            return
+
+        cer, wer = self.evaluate()
+        if logs is not None:
+            logs["val_cer"] = cer
+            logs["val_wer"] = wer
+        print(f"\nEpoch {epoch + 1}: val_cer={cer:.4f} val_wer={wer:.4f}")
+
+        if cer < self.best_cer - self.min_delta:
+            self.best_cer = cer
+            self.best_epoch = epoch + 1
+            self.wait = 0
+            if self.checkpoint_path:
+                self.model.save(self.checkpoint_path)
+                print(f"✅ CER improved; checkpoint saved to {self.checkpoint_path}")
+        else:
+            self.wait += 1
+            if self.patience is not None and self.wait >= self.patience:
+                print(f"⚠️ CER has not improved for {self.wait} evaluations. Stopping training.")
+                self.model.stop_training = True